@@ -1,5 +1,3 @@
-import urllib.parse
-
 from dataclasses import dataclass, field
 from enum import Enum
 from typing import List, Tuple
@@ -9,33 +7,58 @@ import chess
 WHITE_KING, WHITE_QUEEN, WHITE_ROOK, WHITE_BISHOP, WHITE_KNIGHT, WHITE_PAWN = "♔♕♖♗♘♙"  # noqa
 BLACK_KING, BLACK_QUEEN, BLACK_ROOK, BLACK_BISHOP, BLACK_KNIGHT, BLACK_PAWN = "♚♛♜♝♞♟"  # noqa
 
+# Suffix appended to a move's SAN depending on the Lichess judgment name:
+_JUDGEMENT_SUFFIX = {
+    "Inaccuracy": "?!",
+    "Mistake": "?",
+    "Blunder": "??",
+}
+
+# Players summary columns for white and black, rendered by Game.to_console:
+_PLAYERS_HEADER = (
+    "  Score..............: {score_white}"
+    "                  Score..............: {score_black}\n"
+    "  Rating change......: {rating_diff_white:<3}"
+    "                Rating change......: {rating_diff_black}\n"
+)
+_PLAYERS_ANALYSIS = (
+    "  Inaccuracies.......: {white.inaccuracy:<3}"
+    "                Inaccuracies.......: {black.inaccuracy}\n"
+    "  Mistakes...........: {white.mistake:<3}"
+    "                Mistakes...........: {black.mistake}\n"
+    "  Blunders...........: {white.blunder:<3}"
+    "                Blunders...........: {black.blunder}\n"
+    "  AvgLostCentiPawns..: {white.acpl:<3}"
+    "                AvgLostCentiPawns..: {black.acpl}\n"
+)
+
 
 class Color(Enum):
     WHITE = "white"
     BLACK = "black"
 
 
-@dataclass
+@dataclass(slots=True)
 class Clock:
     initial: int = -1
     increment: int = -1
     total_time: int = -1
 
 
-@dataclass
+@dataclass(slots=True)
 class Division:
     middle: int = -1
     end: int = -1
 
 
-@dataclass
+@dataclass(slots=True)
 class Opening:
     eco: str = ""
     name: str = ""
     ply: int = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class PlayerGameAnalysis:
     inaccuracy: int = -1
     mistake: int = -1
@@ -43,13 +66,13 @@ class PlayerGameAnalysis:
     acpl: int = -1
 
 
-@dataclass
+@dataclass(slots=True)
 class User:
     name: str = ""
     id: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class Player:
     color: Color = Color.WHITE
     user: User = field(default_factory=User)
@@ -58,13 +81,13 @@ class Player:
     analysis: PlayerGameAnalysis = field(default_factory=PlayerGameAnalysis)
 
 
-@dataclass
+@dataclass(slots=True)
 class Judgment:
     name: str | None = None
     comment: str | None = None
 
 
-@dataclass
+@dataclass(slots=True)
 class MoveAnalysis:
     eval: int | None = None
     mate: int | None = None
@@ -73,66 +96,66 @@ class MoveAnalysis:
     judgement: Judgment | None = None
 
     def __bool__(self) -> bool:
-        return any(
-            (
-                self.eval is not None,
-                self.mate is not None,
-                self.best is not None,
-                self.variation is not None,
-                self.judgement is not None
-            )
+        return (
+            self.eval is not None
+            or self.mate is not None
+            or self.best is not None
+            or self.variation is not None
+            or self.judgement is not None
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class Move:
     san: str = ""
     clock_centosec: int = 0
     thinking_time_centoseconds: int = 0
-    analysis: MoveAnalysis = field(default_factory=MoveAnalysis)
+    analysis: MoveAnalysis | None = None
+    clock: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.clock = self._centoseconds_to_timestr(self.clock_centosec)
 
     def _centoseconds_to_timestr(self, value: int) -> str:
-        total_seconds = value / 100
-        hours = int(total_seconds // 3600)
-        minutes = int((total_seconds - 3600 * hours) // 60)
-        seconds = total_seconds - 3600 * hours - 60 * minutes
-        return (
-            f"""{str(hours) + ":" if hours > 0 else ""}"""
-            f"{minutes:02d}:{seconds:04.1f}"
-        )
+        if value == 0:
+            return "00:00.0"
+        # Round half up to whole tenths, so that e.g. 59.95 s carries over to 1:00.0:
+        tenths = (value + 5) // 10
+        hours, rest = divmod(tenths, 36000)
+        minutes, rest = divmod(rest, 600)
+        seconds, tenths = divmod(rest, 10)
+        if hours > 0:
+            return "%d:%02d:%02d.%d" % (hours, minutes, seconds, tenths)
+        return "%02d:%02d.%d" % (minutes, seconds, tenths)
 
     def format_evaluation(self) -> str:
         out = ""
-        if self.analysis:
-            if self.analysis.mate is not None:
-                out = f" #{self.analysis.mate}"
-            elif self.analysis.eval is not None:
-                out = str(self.analysis.eval / 100)
-                if not out.startswith("-"):
-                    return " " + out
+        if not self.analysis:  # No analysis, or an analysis without any values
+            return out
+        if self.analysis.mate is not None:
+            out = f" #{self.analysis.mate}"
+        elif self.analysis.eval is not None:
+            out = str(self.analysis.eval / 100)
+            if not out.startswith("-"):
+                return " " + out
         return out
 
     def get_decorated_move(self):
-        out = self.san
-        if self.analysis.judgement:
-            if self.analysis.judgement.name == "Inaccuracy":
-                out += "?!"
-            if self.analysis.judgement.name == "Mistake":
-                out += "?"
-            if self.analysis.judgement.name == "Blunder":
-                out += "??"
-        return out
-
-    @property
-    def clock(self) -> str:
-        return self._centoseconds_to_timestr(self.clock_centosec)
+        if self.analysis is None:
+            return self.san
+        judgement = self.analysis.judgement
+        return self.san + (_JUDGEMENT_SUFFIX.get(judgement.name, "") if judgement else "")
 
     @property
     def thinking_time(self) -> str:
         return self._centoseconds_to_timestr(self.thinking_time_centoseconds)
 
 
-@dataclass
+# Placeholder for the missing black move when a game ends on white. Shared, so never mutate it:
+_EMPTY_MOVE = Move()
+
+
+@dataclass(slots=True)
 class Game:
     id: str = ""
     rated: bool = True
@@ -150,63 +173,56 @@ class Game:
     division: Division = field(default_factory=Division)
     opening: Opening = field(default_factory=Opening)
     has_analysis: bool = False
+    _cached_board: Tuple[chess.Board, str] | None = field(default=None, init=False, repr=False, compare=False)
 
     def board_at_end(self) -> Tuple[chess.Board, str]:
+        if self._cached_board is not None:
+            return self._cached_board
+
         start_positions = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"  # noqa
         board = chess.Board(start_positions)
+        parse_san, push = board.parse_san, board.push
         for move_white, move_black in self.moves:
-            board.push_san(move_white.san)
+            push(parse_san(move_white.san))
             if move_black:
-                board.push_san(move_black.san)
-
-        # Create board, replace letters with Unicode symbols:
-        board_str = str(board)
-        board_str = board_str.replace("k", BLACK_KING)
-        board_str = board_str.replace("q", BLACK_QUEEN)
-        board_str = board_str.replace("r", BLACK_ROOK)
-        board_str = board_str.replace("b", BLACK_BISHOP)
-        board_str = board_str.replace("n", BLACK_KNIGHT)
-        board_str = board_str.replace("p", BLACK_PAWN)
-        board_str = board_str.replace("K", WHITE_KING)
-        board_str = board_str.replace("Q", WHITE_QUEEN)
-        board_str = board_str.replace("R", WHITE_ROOK)
-        board_str = board_str.replace("B", WHITE_BISHOP)
-        board_str = board_str.replace("N", WHITE_KNIGHT)
-        board_str = board_str.replace("P", WHITE_PAWN)
+                push(parse_san(move_black.san))
+
+        # Create board with Unicode symbols:
+        board_str = board.unicode(invert_color=False, borders=False, empty_square=".")
         # Add color legend:
         board_lines = board_str.split("\n")
         board_lines[3] += "   " + WHITE_PAWN + ": white"
         board_lines[4] += "   " + BLACK_PAWN + ": black"
 
-        return (board, "\n".join(board_lines))
+        self._cached_board = (board, "\n".join(board_lines))
+        return self._cached_board
 
     def to_console(self):
         player_white, player_black = self.players
 
         # Moves info:
-        moves_txt = ""
+        move_parts: List[str] = []
         move_counter = 1
         for move_white, move_black in self.moves:
-            if not move_black:
-                move_black = Move()
+            move_black = move_black or _EMPTY_MOVE
             # Counter + san:
             san_deco_white = move_white.get_decorated_move()
             san_deco_black = move_black.get_decorated_move()
-            moves_txt += f"{move_counter:>3}. {san_deco_white:<8} {san_deco_black:<8}"
+            move_parts.append(f"{move_counter:>3}. {san_deco_white:<8} {san_deco_black:<8}")
             # Clock:
             clock_white = move_white.clock
-            clock_black = move_black.clock if move_black.san else ' ' * len(move_white.clock)
-            moves_txt += f"   {clock_white}   {clock_black}"
+            clock_black = move_black.clock if move_black is not _EMPTY_MOVE else ' ' * len(clock_white)
+            move_parts.append(f"   {clock_white}   {clock_black}")
             # Evaluation + comments:
             if self.has_analysis:
                 eval_white = move_white.format_evaluation()
                 eval_black = move_black.format_evaluation()
-                moves_txt += f"   {eval_white:<6}  {eval_black:<6}"
-                if move_white.analysis.judgement:
-                    moves_txt += f"   White: {move_white.analysis.judgement.comment}"
-                if move_black.analysis.judgement:
-                    moves_txt += f"   Black: {move_black.analysis.judgement.comment}"
-            moves_txt += "\n"
+                move_parts.append(f"   {eval_white:<6}  {eval_black:<6}")
+                if move_white.analysis is not None and move_white.analysis.judgement:
+                    move_parts.append(f"   White: {move_white.analysis.judgement.comment}")
+                if move_black.analysis is not None and move_black.analysis.judgement:
+                    move_parts.append(f"   Black: {move_black.analysis.judgement.comment}")
+            move_parts.append("\n")
             move_counter += 1
 
         # Game ending info:
@@ -239,57 +255,57 @@ class Game:
         black_player_and_rating = f"{player_black.user.name[:25]} ({player_black.rating})"
         time_control = f"{self.clock.initial // 60}+{self.clock.increment}"
         rated = "RATED" if self.rated else "NOT RATED"
-        out = ""
-        out += f"LICHESS.ORG · {time_control} · {self.speed.upper()} · {rated}\n"
-        out += "\n"
+        parts: List[str] = []
+        parts.append(f"LICHESS.ORG · {time_control} · {self.speed.upper()} · {rated}\n")
+        parts.append("\n")
         # Players summary:
-        out += f"WHITE: {white_player_and_rating:<32} BLACK: {black_player_and_rating}\n"
-        out += (f"  Score..............: {score_white}"
-                f"                  Score..............: {score_black}\n")
-        out += (f"  Rating change......: {player_white.rating_diff:<3}"
-                f"                Rating change......: {player_black.rating_diff}\n")
+        parts.append(f"WHITE: {white_player_and_rating:<32} BLACK: {black_player_and_rating}\n")
+        parts.append(_PLAYERS_HEADER.format(
+            score_white=score_white,
+            score_black=score_black,
+            rating_diff_white=player_white.rating_diff,
+            rating_diff_black=player_black.rating_diff
+        ))
         if self.has_analysis:
-            out += (f"  Inaccuracies.......: {player_white.analysis.inaccuracy:<3}"
-                    f"                Inaccuracies.......: {player_black.analysis.inaccuracy}\n")
-            out += (f"  Mistakes...........: {player_white.analysis.mistake:<3}"
-                    f"                Mistakes...........: {player_black.analysis.mistake}\n")
-            out += (f"  Blunders...........: {player_white.analysis.blunder:<3}"
-                    f"                Blunders...........: {player_black.analysis.blunder}\n")
-            out += (f"  AvgLostCentiPawns..: {player_white.analysis.acpl:<3}"
-                    f"                AvgLostCentiPawns..: {player_black.analysis.acpl}\n")
+            parts.append(_PLAYERS_ANALYSIS.format(
+                white=player_white.analysis,
+                black=player_black.analysis
+            ))
         else:
-            out += "\nThis game has not been analyzed, so analysis data is unavailable.\n"
-        out += "\n"
-        out += f"Opening: [{self.opening.eco}] {self.opening.name}\n\n"
+            parts.append("\nThis game has not been analyzed, so analysis data is unavailable.\n")
+        parts.append("\n")
+        parts.append(f"Opening: [{self.opening.eco}] {self.opening.name}\n\n")
 
         # Add moves:
-        out += moves_txt + "\n"
+        parts.extend(move_parts)
+        parts.append("\n")
 
         # Add game ending:
-        out += f"*** {game_ending} ***" + "\n"
+        parts.append(f"*** {game_ending} ***\n")
 
         # Add middlegame and endgame info:
-        out += "\n"
+        parts.append("\n")
         if self.division.middle:
             move_no = self.division.middle // 2 + 1
             white_or_black = "black" if self.division.middle % 2 == 0 else "white"
-            out += f"Middlegame started at move {move_no} ({white_or_black})\n"
+            parts.append(f"Middlegame started at move {move_no} ({white_or_black})\n")
         if self.division.end:
             move_no = self.division.end // 2 + 1
             white_or_black = "black" if self.division.end % 2 == 0 else "white"
-            out += f"Endgame started at move {move_no} ({white_or_black})\n"
+            parts.append(f"Endgame started at move {move_no} ({white_or_black})\n")
 
         # Add board:
         board, board_unicode = self.board_at_end()
         last_move_uci = board.move_stack[-1].uci()
-        board_fen = board.board_fen()
-        board_gif_url = f"GIF: https://lichess.org/export/fen.gif?fen={urllib.parse.quote_plus(board_fen)}&lastMove={last_move_uci}"  # noqa
-        out += "\nFinal position:\n"
-        out += board_unicode + "   " + board_gif_url + "\n"
-        out += "\n"
+        # The board FEN only contains piece letters, digits and "/", so "/" is the only character to escape:
+        board_fen = board.board_fen().replace("/", "%2F")
+        board_gif_url = f"GIF: https://lichess.org/export/fen.gif?fen={board_fen}&lastMove={last_move_uci}"  # noqa
+        parts.append("\nFinal position:\n")
+        parts.append(board_unicode + "   " + board_gif_url + "\n")
+        parts.append("\n")
 
         # Add game source URL:
-        out += f"Game URL: https://lichess.org/{self.id}\n"
-        out += "\n"
+        parts.append(f"Game URL: https://lichess.org/{self.id}\n")
+        parts.append("\n")
 
-        return out
+        return "".join(parts)
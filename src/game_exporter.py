@@ -3,10 +3,9 @@
 Exports a Lichess game in a human-readable format to stdout.
 """
 
-import json
 import sys
 
-from typing import Dict
+from typing import Dict, List, Tuple
 
 import lichess.api
 import requests.exceptions
@@ -17,121 +16,163 @@ from data_models import (Clock, Color, Division, Game, Judgment, Move,
 
 
 def get_game_object_from_lichess(game_id: str) -> Dict | None:
+    # Returns None if Lichess could not be contacted, and an empty dict if
+    # there is no game with that ID:
     try:
         result = lichess.api.game(game_id)
     except requests.exceptions.ConnectionError:
         return None
+    except lichess.api.ApiHttpError as error:
+        if error.http_status == 404:
+            return {}
+        raise
     return result
 
 
-def create_game_from_json(json_game) -> Game:
-    game = Game()
-    if "analysis" in json.dumps(json_game):
-        game.has_analysis = True
+def get_game_objects_from_lichess(game_ids: List[str]) -> Dict[str, Dict] | None:
+    # Returns the games keyed by game ID, leaving out IDs that Lichess does not
+    # know, or None if Lichess could not be contacted.
+    if len(game_ids) == 1:
+        json_game = get_game_object_from_lichess(game_ids[0])
+        if json_game is None:
+            return None
+        return {game_ids[0]: json_game} if json_game else {}
 
-    ###########
-    # PLAYERS
-    #
-    json_player = json_game["players"]["white"]
-    player_game_analysis = PlayerGameAnalysis()
-    if game.has_analysis:
-        player_game_analysis = PlayerGameAnalysis(
-            json_player.get("analysis", {}).get("inaccuracy", -1),
-            json_player.get("analysis", {}).get("mistake", -1),
-            json_player.get("analysis", {}).get("blunder", -1),
-            json_player.get("analysis", {}).get("acpl", -1),
-        )
-    player_white = Player(
-        Color.WHITE,
-        User(
-            json_player["user"]["name"],
-            json_player["user"]["id"]
-        ),
-        json_player["rating"],
-        json_player["ratingDiff"],
-        player_game_analysis
+    # One batched export request per 300 games instead of one request (and
+    # rate-limit delay) per game. Unlike the single game export, the batch
+    # endpoint leaves clocks, evals, opening and division out unless asked for,
+    # and silently skips unknown IDs:
+    try:
+        result = {
+            json_game["id"]: json_game
+            for json_game in lichess.api.games_by_ids(
+                game_ids,
+                clocks="true",
+                evals="true",
+                opening="true",
+                division="true"
+            )
+        }
+    except requests.exceptions.ConnectionError:
+        return None
+    return result
+
+
+def _create_move_analysis(json_analysis: Dict) -> MoveAnalysis:
+    json_judgment = json_analysis.get("judgment")
+    return MoveAnalysis(
+        json_analysis.get("eval"),
+        json_analysis.get("mate"),
+        json_analysis.get("best"),
+        json_analysis.get("variation"),
+        Judgment(
+            json_judgment["name"],
+            json_judgment["comment"],
+        ) if json_judgment else None
     )
 
-    json_player = json_game["players"]["black"]
+
+def _create_player(color: Color, json_player: Dict, has_analysis: bool) -> Player:
     player_game_analysis = PlayerGameAnalysis()
-    if game.has_analysis:
+    if has_analysis:
+        json_analysis = json_player.get("analysis") or {}
         player_game_analysis = PlayerGameAnalysis(
-            json_player.get("analysis", {}).get("inaccuracy", -1),
-            json_player.get("analysis", {}).get("mistake", -1),
-            json_player.get("analysis", {}).get("blunder", -1),
-            json_player.get("analysis", {}).get("acpl", -1),
+            json_analysis.get("inaccuracy", -1),
+            json_analysis.get("mistake", -1),
+            json_analysis.get("blunder", -1),
+            json_analysis.get("acpl", -1),
         )
-    player_black = Player(
-        Color.BLACK,
+    json_user = json_player["user"]
+    return Player(
+        color,
         User(
-            json_player["user"]["name"],
-            json_player["user"]["id"]
+            json_user["name"],
+            json_user["id"]
         ),
         json_player["rating"],
         json_player["ratingDiff"],
         player_game_analysis
     )
 
-    #########
-    # MOVES
-    #
-    moves_sans = json_game["moves"].split(" ")
-    moves_clocks = json_game["clocks"]
-    moves_analyses = json_game.get("analysis")
 
-    moves = []
-    move_white = None
-    color = Color.WHITE
-    for idx, move_san in enumerate(moves_sans):
-        thinking_time_cs = moves_clocks[idx] - moves_clocks[idx - 2] if idx >= 2 else 0  # noqa
-        move_analysis = MoveAnalysis()
-        if game.has_analysis and idx < len(moves_analyses):
-            move_analysis = MoveAnalysis(
-                moves_analyses[idx].get("eval"),
-                moves_analyses[idx].get("mate"),
-                moves_analyses[idx].get("best"),
-                moves_analyses[idx].get("variation"),
-                Judgment(
-                    moves_analyses[idx]["judgment"]["name"],
-                    moves_analyses[idx]["judgment"]["comment"],
-                ) if moves_analyses[idx].get("judgment") else None
-            )
+def _create_moves(
+    moves_sans: List[str],
+    moves_clocks: List[int],
+    moves_analyses: List[Dict] | None,
+    has_analysis: bool
+) -> List[Tuple[Move, Move | None]]:
+    # A player's thinking time is the difference to their own previous clock:
+    thinking_times = [0, 0] + [now - prev for now, prev in zip(moves_clocks[2:], moves_clocks)]
+
+    n_plies = len(moves_sans)
+    n_analyses = len(moves_analyses) if has_analysis and moves_analyses else 0
 
-        move = Move(
-            move_san,
+    moves = []
+    for idx in range(0, n_plies, 2):
+        move_white = Move(
+            moves_sans[idx],
             moves_clocks[idx],
-            thinking_time_cs,
-            move_analysis
+            thinking_times[idx],
+            _create_move_analysis(moves_analyses[idx]) if idx < n_analyses else None
         )
+        move_black = None
+        if idx + 1 < n_plies:  # No last black move if the game ended on white
+            move_black = Move(
+                moves_sans[idx + 1],
+                moves_clocks[idx + 1],
+                thinking_times[idx + 1],
+                _create_move_analysis(moves_analyses[idx + 1]) if idx + 1 < n_analyses else None
+            )
+        moves.append((move_white, move_black))
+    return moves
+
+
+def create_game_from_json(json_game) -> Game:
+    game = Game()
+    json_players = json_game["players"]
+    game.has_analysis = (
+        "analysis" in json_game
+        or "analysis" in json_players["white"]
+        or "analysis" in json_players["black"]
+    )
 
-        if color == Color.WHITE:
-            color = Color.BLACK
-            move_white = move
-        else:
-            color = Color.WHITE
-            moves.append((move_white, move))
-            move_white = None
-    if move_white:  # No last black move
-        moves.append((move_white, None))
+    ###########
+    # PLAYERS
+    #
+    player_white = _create_player(Color.WHITE, json_players["white"], game.has_analysis)
+    player_black = _create_player(Color.BLACK, json_players["black"], game.has_analysis)
+
+    #########
+    # MOVES
+    #
+    moves = _create_moves(
+        json_game["moves"].split(" "),
+        json_game["clocks"],
+        json_game.get("analysis"),
+        game.has_analysis
+    )
 
     ################
     # GAME DETAILS
     #
+    json_opening = json_game["opening"]
     opening = Opening(
-        eco=json_game["opening"].get("eco", ""),
-        name=json_game["opening"].get("name", ""),
-        ply=json_game["opening"].get("ply", 0)
+        eco=json_opening.get("eco", ""),
+        name=json_opening.get("name", ""),
+        ply=json_opening.get("ply", 0)
     )
 
+    json_clock = json_game["clock"]
     clock = Clock(
-        initial=json_game["clock"].get("initial", -1),
-        increment=json_game["clock"].get("increment", -1),
-        total_time=json_game["clock"].get("totalTime", -1)
+        initial=json_clock.get("initial", -1),
+        increment=json_clock.get("increment", -1),
+        total_time=json_clock.get("totalTime", -1)
     )
 
+    json_division = json_game["division"]
     division = Division(
-        middle=json_game["division"].get("middle"),
-        end=json_game["division"].get("end")
+        middle=json_division.get("middle"),
+        end=json_division.get("end")
     )
 
     game.id = json_game.get("id", "N/A")
@@ -157,16 +198,30 @@ def create_game_from_json(json_game) -> Game:
 
 if __name__ == "__main__":
     if len(sys.argv) > 1:
-        GAME_ID = sys.argv[1]
+        GAME_IDS = sys.argv[1:]
     else:
-        print("Please supply the Lichess game ID as argument.")
+        print("Please supply one or more Lichess game IDs as arguments.")
         sys.exit(0)
 
-    json_game = get_game_object_from_lichess(GAME_ID)
-    if not json_game:
+    json_games = get_game_objects_from_lichess(GAME_IDS)
+    if json_games is None:
         print("ERROR: Could not contact Lichess! Stopping...")
         sys.exit(-1)
-    # print(json.dumps(json_game, indent=2))
-    game = create_game_from_json(json_game)
-    print()
-    print(game.to_console())
+
+    failed = False
+    for game_id in GAME_IDS:
+        json_game = json_games.get(game_id)
+        if json_game is None:
+            print(f"ERROR: game {game_id} not found")
+            failed = True
+            continue
+        try:
+            game = create_game_from_json(json_game)
+        except KeyError as error:  # E.g. no "clocks" in correspondence games
+            print(f"ERROR: game {game_id} has no {error} data and cannot be exported")
+            failed = True
+            continue
+        print()
+        print(game.to_console())
+    if failed:
+        sys.exit(-1)